@@ -0,0 +1,77 @@
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import pandas as pd
+
+from fix_csv import clean_csv, read_csv, encode_low_cardinality
+
+
+def measure(csv_path, arrow_strings):
+    """
+    Load and clean csv_path on one string path, returning deep memory
+    per column for the loaded and cleaned frames plus timings
+    """
+    start = time.perf_counter()
+    loaded = read_csv(csv_path, arrow_strings)
+    if arrow_strings:
+        loaded = encode_low_cardinality(loaded)
+    load_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            cleaned = clean_csv(csv_path, os.path.join(tmp, "fixed.csv"), arrow_strings=arrow_strings)
+        clean_s = time.perf_counter() - start
+
+    return {
+        "loaded": loaded.memory_usage(deep=True, index=False),
+        "cleaned": cleaned.memory_usage(deep=True, index=False),
+        "dtypes": cleaned.dtypes,
+        "load_s": load_s,
+        "clean_s": clean_s,
+    }
+
+
+def compare_string_memory(csv_path="organizations-10000.csv"):
+    """
+    Compare the object-dtype path with the Arrow string path on csv_path
+
+    Args:
+        csv_path (str): CSV to load and clean
+
+    Returns:
+        pd.DataFrame: Per-column cleaned memory (bytes) for both paths
+    """
+    obj = measure(csv_path, arrow_strings=False)
+    arrow = measure(csv_path, arrow_strings=True)
+
+    columns = pd.DataFrame({
+        "object_dtype": obj["dtypes"].astype(str),
+        "arrow_dtype": arrow["dtypes"].astype(str),
+        "object_bytes": obj["cleaned"],
+        "arrow_bytes": arrow["cleaned"],
+    })
+    columns["saved"] = 1 - columns["arrow_bytes"] / columns["object_bytes"]
+
+    print(f"Memory comparison for {csv_path}\n")
+    print(columns.to_string(formatters={"saved": "{:.0%}".format}))
+    print()
+    for stage in ("loaded", "cleaned"):
+        before = obj[stage].sum()
+        after = arrow[stage].sum()
+        print(f"{stage:>8}: object {before / 1e6:8.2f} MB  arrow {after / 1e6:8.2f} MB  "
+              f"({1 - after / before:.0%} less)")
+    print(f"    load: object {obj['load_s']:.2f}s  arrow {arrow['load_s']:.2f}s")
+    print(f"   clean: object {obj['clean_s']:.2f}s  arrow {arrow['clean_s']:.2f}s")
+
+    return columns
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or ["organizations-10000.csv", "combined_7_columns.csv"]:
+        compare_string_memory(path)
+        print("\n" + "="*50 + "\n")
@@ -1,41 +1,95 @@
 import pandas as pd
 import numpy as np
 import re
+import os
+import io
+import json
+import hashlib
 from datetime import datetime
+from pandas.tseries.api import guess_datetime_format
 
-def clean_csv(input_file, output_file="fixed.csv"):
+CHECKPOINT_VERSION = 3
+HASH_WINDOW = 64 * 1024
+# Below this many rows categoricals save little and would swallow
+# columns like amounts that merely repeat in a short table
+MIN_CATEGORY_ROWS = 1000
+
+BOOL_MAPPING = {
+    'yes': True, 'no': False,
+    'true': True, 'false': False,
+    'y': True, 'n': False,
+    't': True, 'f': False,
+    '1': True, '0': False
+}
+
+
+def clean_csv(input_file, output_file="fixed.csv", incremental=False, checkpoint_file=None,
+              arrow_strings=False):
     """
     Automatically detect and fix common CSV issues
     
     Args:
         input_file (str): Path to input CSV file
         output_file (str): Path to save cleaned CSV
+        incremental (bool): Only clean rows appended since the last run and
+            append them to output_file. Falls back to a full rebuild when
+            there is no checkpoint or the already-processed part changed.
+        checkpoint_file (str): Where to keep the incremental checkpoint,
+            defaults to "<output_file>.checkpoint.json"
+        arrow_strings (bool): Load and clean text as Arrow-backed strings
+            (needs pyarrow) and return low-cardinality text as categoricals
     
     Returns:
-        pd.DataFrame: Cleaned dataframe
+        pd.DataFrame: Cleaned dataframe (only the newly appended rows when
+            an incremental run reuses its checkpoint)
     """
+    checkpoint_file = checkpoint_file or f"{output_file}.checkpoint.json"
+    if incremental:
+        checkpoint = load_checkpoint(checkpoint_file)
+        if checkpoint is not None and os.path.exists(output_file):
+            reason = checkpoint_mismatch(input_file, output_file, checkpoint, arrow_strings)
+            if reason is None:
+                df = clean_appended_rows(input_file, output_file, checkpoint, checkpoint_file)
+                if df is not None:
+                    if arrow_strings:
+                        df = encode_low_cardinality(df)
+                    return df
+            else:
+                print(f"⚠ {reason}, rebuilding {output_file} from scratch")
+    elif os.path.exists(checkpoint_file):
+        # The output is about to be rewritten, so the checkpoint no longer describes it
+        os.remove(checkpoint_file)
+
     print(f"Reading {input_file}...")
-    df = pd.read_csv(input_file)
+    if incremental:
+        data = read_complete_rows(input_file)
+        df = read_csv(io.BytesIO(data), arrow_strings)
+    else:
+        df = read_csv(input_file, arrow_strings)
     print(f"Original shape: {df.shape}")
     print(f"Original dtypes:\n{df.dtypes}\n")
     
+    plan = new_cleaning_plan(df, arrow_strings) if incremental else None
+    
     # 1. Clean column names
     df = standardize_column_names(df)
+    columns = df.columns.tolist()
     
     # 2. Remove duplicate rows
     df = remove_duplicates(df)
+    fingerprints = row_fingerprints(df) if incremental else None
     
     # 3. Fix whitespace in text columns
     df = fix_whitespace(df)
     
     # 4. Detect and fix numeric columns stored as strings
-    df = fix_numeric_columns(df)
+    df = fix_numeric_columns(df, plan)
     
     # 5. Detect and fix date columns
-    df = fix_date_columns(df)
+    df = fix_date_columns(df, plan)
     
     # 6. Fix boolean columns
-    df = fix_boolean_columns(df)
+    df = fix_boolean_columns(df, plan)
     
     # 7. Handle missing values
     df = handle_missing_values(df)
@@ -49,6 +103,85 @@ def clean_csv(input_file, output_file="fixed.csv"):
     print(f"Final shape: {df.shape}")
     print(f"Final dtypes:\n{df.dtypes}")
     
+    if incremental:
+        plan["output_columns"] = df.columns.tolist()
+        plan["dropped_columns"] = [col for col in columns if col not in plan["output_columns"]]
+        save_checkpoint(checkpoint_file, input_file, len(data), output_file, plan, fingerprints)
+    
+    if arrow_strings:
+        df = encode_low_cardinality(df)
+    
+    return df
+
+
+def read_csv(source, arrow_strings=False, **kwargs):
+    """
+    Read a CSV file or upload. With arrow_strings the pyarrow parser loads
+    text straight into Arrow-backed string columns, so no Python str objects
+    are created and the .str methods run on Arrow kernels.
+    """
+    if arrow_strings:
+        start = source.tell() if hasattr(source, "seek") else None
+        try:
+            df = pd.read_csv(source, engine="pyarrow", dtype_backend="pyarrow", **kwargs)
+        except pd.errors.ParserError as e:
+            # The pyarrow parser rejects input the C parser accepts, e.g.
+            # ragged rows (padded with NaN); the C parser still gives Arrow dtypes
+            print(f"⚠ pyarrow parser failed ({e}), retrying with the C parser")
+            if start is not None:
+                source.seek(start)
+            return pd.read_csv(source, dtype_backend="pyarrow", **kwargs)
+        # The pyarrow parser keeps repeated header names as-is
+        df.columns = dedupe_columns(df.columns.tolist())
+        return df
+    return pd.read_csv(source, **kwargs)
+
+
+def dedupe_columns(columns):
+    """Rename repeated column names to name.1, name.2, ... like the C parser does"""
+    seen = set()
+    renamed = []
+    for col in columns:
+        name, i = col, 0
+        while name in seen or (name != col and name in columns):
+            i += 1
+            name = f"{col}.{i}"
+        seen.add(name)
+        renamed.append(name)
+    return renamed
+
+
+def is_text_column(series):
+    """Object columns, or Arrow-backed / pandas string columns"""
+    return series.dtype == 'object' or is_string_column(series)
+
+
+def is_string_column(series):
+    return (
+        isinstance(series.dtype, (pd.StringDtype, pd.ArrowDtype))
+        and pd.api.types.is_string_dtype(series.dtype)
+    )
+
+
+def as_text(series):
+    """Series as strings; string dtypes are returned as-is instead of copied to object"""
+    if is_string_column(series):
+        return series
+    return series.astype(str)
+
+
+def encode_low_cardinality(df, max_ratio=0.5, min_rows=MIN_CATEGORY_ROWS):
+    """
+    Dictionary-encode text columns with few distinct values (e.g. Country,
+    Industry) as categoricals, which keep their Arrow string categories.
+    Frames shorter than min_rows are left as strings.
+    """
+    if len(df) < min_rows:
+        return df
+    for col in df.columns:
+        if is_text_column(df[col]):
+            if df[col].nunique() / len(df) <= max_ratio:
+                df[col] = df[col].astype("category")
     return df
 
 
@@ -79,18 +212,18 @@ def remove_duplicates(df):
 def fix_whitespace(df):
     """Remove leading/trailing whitespace from string columns"""
     for col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].astype(str).str.strip()
+        if is_text_column(df[col]):
+            df[col] = as_text(df[col]).str.strip()
             df[col] = df[col].replace('nan', np.nan)
             df[col] = df[col].replace('', np.nan)
     print("✓ Cleaned whitespace from text columns")
     return df
 
 
-def fix_numeric_columns(df):
+def fix_numeric_columns(df, plan=None):
     """Convert string columns that should be numeric"""
     for col in df.columns:
-        if df[col].dtype == 'object':
+        if is_text_column(df[col]):
             sample = df[col].dropna().head(100)
             if len(sample) == 0:
                 continue
@@ -102,26 +235,35 @@ def fix_numeric_columns(df):
             
             if numeric_count / len(sample) > 0.7:  # 70% threshold
                 try:
-                    # Remove commas, dollar signs, percentages
-                    cleaned = (
-                        df[col]
-                        .astype(str)
-                        .str.replace(',', '')
-                        .str.replace('$', '')
-                        .str.replace('%', '')
-                        .str.strip()
-                    )
-                    df[col] = pd.to_numeric(cleaned, errors='coerce')
+                    df[col] = to_numeric(df[col])
+                    if plan is not None:
+                        plan["numeric"].append(col)
                     print(f"✓ Converted '{col}' to numeric")
                 except Exception as e:
                     print(f"✗ Could not convert '{col}': {e}")
     return df
 
 
-def fix_date_columns(df):
+def to_numeric(series):
+    """Strip commas, dollar signs and percentages, then parse as numbers"""
+    cleaned = (
+        as_text(series)
+        .str.replace(',', '')
+        .str.replace('$', '')
+        .str.replace('%', '')
+        .str.strip()
+    )
+    numeric = pd.to_numeric(cleaned, errors='coerce')
+    if is_string_column(series):
+        # Coerced values come back as NaN rather than null on Arrow arrays
+        numeric = numeric.mask(numeric != numeric)
+    return numeric
+
+
+def fix_date_columns(df, plan=None):
     """Detect and convert date columns"""
     for col in df.columns:
-        if df[col].dtype == 'object':
+        if is_text_column(df[col]):
             sample = df[col].dropna().head(50)
             if len(sample) == 0:
                 continue
@@ -131,24 +273,20 @@ def fix_date_columns(df):
                 parsed = pd.to_datetime(sample, errors='coerce')
                 if parsed.notna().sum() / len(sample) > 0.7:  # 70% successfully parsed
                     df[col] = pd.to_datetime(df[col], errors='coerce')
+                    if plan is not None:
+                        # to_datetime infers the format from the first value,
+                        # keep it so appended rows are parsed the same way
+                        plan["date"][col] = guess_datetime_format(str(sample.iloc[0]))
                     print(f"✓ Converted '{col}' to datetime")
             except:
                 pass
     return df
 
 
-def fix_boolean_columns(df):
+def fix_boolean_columns(df, plan=None):
     """Convert text boolean values to actual boolean"""
-    bool_mapping = {
-        'yes': True, 'no': False,
-        'true': True, 'false': False,
-        'y': True, 'n': False,
-        't': True, 'f': False,
-        '1': True, '0': False
-    }
-    
     for col in df.columns:
-        if df[col].dtype == 'object':
+        if is_text_column(df[col]):
             sample = df[col].dropna().head(100)
             if len(sample) == 0:
                 continue
@@ -157,8 +295,10 @@ def fix_boolean_columns(df):
             unique_vals = set(sample_lower.unique())
             
             # Check if all unique values are boolean-like
-            if unique_vals.issubset(bool_mapping.keys()):
-                df[col] = df[col].astype(str).str.lower().str.strip().map(bool_mapping)
+            if unique_vals.issubset(BOOL_MAPPING.keys()):
+                df[col] = as_text(df[col]).str.lower().str.strip().map(BOOL_MAPPING)
+                if plan is not None:
+                    plan["boolean"].append(col)
                 print(f"✓ Converted '{col}' to boolean")
     return df
 
@@ -196,6 +336,243 @@ def remove_empty_rows_cols(df):
     return df
 
 
+def new_cleaning_plan(df, arrow_strings=False):
+    """Empty cleaning plan for a freshly read dataframe"""
+    return {
+        "arrow_strings": arrow_strings,
+        "raw_columns": df.columns.tolist(),
+        "raw_dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "numeric": [],
+        "date": {},
+        "boolean": [],
+        "output_columns": [],
+        "dropped_columns": [],
+    }
+
+
+def apply_cleaning_plan(df, plan):
+    """Apply the conversions recorded in a cleaning plan instead of re-detecting them"""
+    for col in plan["numeric"]:
+        df[col] = to_numeric(df[col])
+    for col, date_format in plan["date"].items():
+        df[col] = pd.to_datetime(df[col], format=date_format, errors='coerce')
+    for col in plan["boolean"]:
+        df[col] = as_text(df[col]).str.lower().str.strip().map(BOOL_MAPPING)
+    df = df[plan["output_columns"]]
+    return df.dropna(axis=0, how='all')
+
+
+def row_fingerprints(df):
+    """
+    64-bit hash per row, used to dedupe appended rows against earlier ones.
+    Columns are hashed as they are (Arrow columns without a copy to object
+    strings); read_appended_rows gives new rows the same dtypes.
+    """
+    return pd.util.hash_pandas_object(df, index=False).tolist()
+
+
+def read_complete_rows(input_file, offset=0):
+    """
+    Read bytes from offset up to the end of the last complete row, so a row
+    that is still being written is left for the next run. offset must be
+    at a row boundary.
+    """
+    with open(input_file, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = complete_rows_end(data)
+    if end < len(data):
+        print(f"⚠ Holding back {len(data) - end} trailing bytes of {input_file} "
+              f"that don't end a row yet; they are cleaned once the row is terminated")
+    return data[:end]
+
+
+def complete_rows_end(data):
+    """Length of data up to the last newline that is not inside a quoted field"""
+    end = 0
+    pos = 0
+    in_quotes = False
+    for line in data.split(b"\n")[:-1]:
+        pos += len(line) + 1
+        # Escaped quotes ("") come in pairs, so only an odd count flips state
+        if line.count(b'"') % 2:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            end = pos
+    return end
+
+
+def hash_region(input_file, start, end):
+    """sha256 of input_file[start:end]"""
+    with open(input_file, "rb") as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+def load_checkpoint(checkpoint_file):
+    """Load an incremental checkpoint, or None if missing or unreadable"""
+    if not os.path.exists(checkpoint_file):
+        return None
+    try:
+        with open(checkpoint_file, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read checkpoint '{checkpoint_file}': {e}")
+        return None
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_file, input_file, offset, output_file, plan, fingerprints):
+    """
+    Record how far input_file has been cleaned. The head and tail hashes
+    cover the first and last HASH_WINDOW bytes before offset so a rewrite
+    of already-processed data is noticed without re-reading the whole file;
+    the output's size and tail hash do the same for output_file.
+    """
+    output_size = os.path.getsize(output_file)
+    checkpoint = {
+        "version": CHECKPOINT_VERSION,
+        "offset": offset,
+        "head_hash": hash_region(input_file, 0, min(offset, HASH_WINDOW)),
+        "tail_hash": hash_region(input_file, max(0, offset - HASH_WINDOW), offset),
+        "output_size": output_size,
+        "output_hash": hash_region(output_file, max(0, output_size - HASH_WINDOW), output_size),
+        "plan": plan,
+        "fingerprints": fingerprints,
+    }
+    # Write then rename, so a crash never leaves a half-written checkpoint
+    tmp_file = f"{checkpoint_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_file, checkpoint_file)
+    print(f"✓ Checkpoint saved to: {checkpoint_file} (offset {offset})")
+
+
+def checkpoint_mismatch(input_file, output_file, checkpoint, arrow_strings=False):
+    """
+    Reason the checkpoint can't be reused for input_file and output_file,
+    or None if it can. Rows appended to output_file after the checkpoint
+    was saved (an interrupted run) are truncated away.
+    """
+    if checkpoint["plan"]["arrow_strings"] != arrow_strings:
+        return f"Checkpoint was made with arrow_strings={checkpoint['plan']['arrow_strings']}"
+    offset = checkpoint["offset"]
+    if os.path.getsize(input_file) < offset:
+        return "Input file is smaller than the checkpoint"
+    if hash_region(input_file, 0, min(offset, HASH_WINDOW)) != checkpoint["head_hash"]:
+        return "Head of the input file changed"
+    if hash_region(input_file, max(0, offset - HASH_WINDOW), offset) != checkpoint["tail_hash"]:
+        return "Already-cleaned rows of the input file changed"
+
+    output_size = checkpoint["output_size"]
+    current_size = os.path.getsize(output_file)
+    if current_size < output_size:
+        return "Output file is smaller than the checkpoint"
+    if hash_region(output_file, max(0, output_size - HASH_WINDOW), output_size) != checkpoint["output_hash"]:
+        return "Output file changed since the checkpoint"
+    if current_size > output_size:
+        print(f"⚠ Dropping {current_size - output_size} bytes appended to {output_file} "
+              f"after the last checkpoint")
+        with open(output_file, "r+b") as f:
+            f.truncate(output_size)
+    return None
+
+
+def clean_appended_rows(input_file, output_file, checkpoint, checkpoint_file):
+    """
+    Clean only the rows appended since the checkpoint and append them to
+    output_file. Returns None if the new rows don't fit the recorded column
+    types, so the caller can rebuild.
+    """
+    plan = checkpoint["plan"]
+    offset = checkpoint["offset"]
+    data = read_complete_rows(input_file, offset)
+    if not data.strip():
+        print(f"✓ No new rows in {input_file} since offset {offset}")
+        return pd.DataFrame(columns=plan["output_columns"])
+
+    print(f"Reading {len(data)} new bytes of {input_file} from offset {offset}...")
+    df = read_appended_rows(data, plan)
+    if df is None:
+        return None
+    df = standardize_column_names(df)
+
+    # Drop rows already seen in this run or earlier ones
+    seen = set(checkpoint["fingerprints"])
+    fingerprints = row_fingerprints(df)
+    keep = []
+    for fingerprint in fingerprints:
+        keep.append(fingerprint not in seen)
+        seen.add(fingerprint)
+    removed = len(keep) - sum(keep)
+    df = df[keep].copy()
+    if removed > 0:
+        print(f"✓ Removed {removed} duplicate rows")
+
+    df = fix_whitespace(df)
+    # Columns dropped as empty on the first run would silently lose any
+    # values that show up now; a rebuild brings them back into the output
+    for col in plan["dropped_columns"]:
+        if df[col].notna().any():
+            print(f"⚠ Column '{col}' was empty but new rows fill it, rebuilding from scratch")
+            return None
+    df = apply_cleaning_plan(df, plan)
+
+    df.to_csv(output_file, mode="a", header=False, index=False)
+    print(f"\n✓ Appended {len(df)} cleaned rows to: {output_file}")
+
+    fingerprints = [f for f, k in zip(fingerprints, keep) if k]
+    save_checkpoint(checkpoint_file, input_file, offset + len(data), output_file, plan,
+                    checkpoint["fingerprints"] + fingerprints)
+    return df
+
+
+def read_appended_rows(data, plan):
+    """
+    Parse appended bytes with the original columns and dtypes. Text columns
+    are read as text; the rest are cast to their recorded dtype, so rows
+    fingerprint like the earlier ones. Returns None if a column no longer
+    fits its recorded dtype (e.g. text in a column that was all numbers).
+    """
+    arrow_strings = plan.get("arrow_strings", False)
+    if arrow_strings:
+        import pyarrow as pa
+        text = {"string[pyarrow]": pd.ArrowDtype(pa.string())}
+    else:
+        text = {"object": "object"}
+    dtypes = {
+        col: text[dtype] for col, dtype in plan["raw_dtypes"].items()
+        if dtype in text
+    }
+    df = read_csv(io.BytesIO(data), arrow_strings, header=None, names=plan["raw_columns"], dtype=dtypes)
+
+    for col, dtype in plan["raw_dtypes"].items():
+        if dtype in text or str(df[col].dtype) == dtype:
+            continue
+        # Only cast between numeric types, and only when no value changes
+        # (ints into a float column, whole floats into an int column);
+        # anything else means the column's type has changed
+        target = pd.api.types.pandas_dtype(dtype)
+        try:
+            if not (is_number_dtype(df[col].dtype) and is_number_dtype(target)):
+                raise TypeError(f"read as {df[col].dtype}")
+            converted = df[col].astype(target)
+            if not ((converted == df[col]) | df[col].isna()).all():
+                raise ValueError(f"read as {df[col].dtype}, casting would change values")
+            df[col] = converted
+        except (ValueError, TypeError, NotImplementedError) as e:
+            print(f"⚠ New rows of '{col}' don't fit its {dtype} dtype ({e}), "
+                  f"rebuilding from scratch")
+            return None
+    return df
+
+
+def is_number_dtype(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
 # Example usage
 if __name__ == "__main__":
     # Clean a CSV file
@@ -6,6 +6,8 @@ from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe
 from io import StringIO
 import sys
 from prompt_corrector import correct_prompt
+from telemetry import RequestTelemetry
+from fix_csv import read_csv, encode_low_cardinality
 
 st.title("NIYAMR CHAT APP")
 st.write("Upload your CSV & ask anything")
@@ -21,7 +23,20 @@ if openai_key:
 
     file = st.file_uploader("Select your file", type=["csv"])
     if file is not None:
-        df = pd.read_csv(file)
+        arrow_on = st.toggle(
+            "Arrow strings",
+            value=False,
+            help="Load text columns as Arrow-backed strings to cut memory (needs pyarrow)"
+        )
+        try:
+            df = read_csv(file, arrow_strings=arrow_on)
+        except ImportError:
+            st.warning("pyarrow is not installed, loading without Arrow strings.")
+            arrow_on = False
+            file.seek(0)
+            df = read_csv(file)
+        if arrow_on:
+            df = encode_low_cardinality(df)
 
         st.write("### Data Preview")
         st.dataframe(df.head())
@@ -32,12 +47,16 @@ if openai_key:
 
         if st.button("Submit") and question:
             with st.spinner("Processing your question..."):
+                telemetry = RequestTelemetry(question)
                 try:
                     current_question = question
                     if preprompt_on:
                         with st.status("Correcting prompt...", expanded=False) as status:
                             table_head = df.head(5).to_string()
-                            current_question = correct_prompt(question, table_head, openai_key)
+                            with telemetry.span("prompt_correction"):
+                                current_question = correct_prompt(
+                                    question, table_head, openai_key, callbacks=[telemetry]
+                                )
                             st.write(f"**Original:** {question}")
                             st.write(f"**Corrected:** {current_question}")
                             status.update(label="Prompt corrected!", state="complete", expanded=False)
@@ -59,42 +78,47 @@ if openai_key:
                     )
                     
                     # Get the full response with intermediate steps
-                    result = agent.invoke({"input": current_question})
+                    with telemetry.span("agent"):
+                        result = agent.invoke(
+                            {"input": current_question},
+                            config={"callbacks": [telemetry]}
+                        )
                     
-                    st.success("### Answer:")
-                    st.write(result["output"])
+                    with telemetry.span("rendering"):
+                        st.success("### Answer:")
+                        st.write(result["output"])
                     
-                    # Show intermediate steps (the actual code execution and results)
-                    if "intermediate_steps" in result and result["intermediate_steps"]:
-                        with st.expander("🔍 View Detailed Execution Steps", expanded=False):
-                            for i, (action, observation) in enumerate(result["intermediate_steps"]):
-                                st.markdown(f"**Step {i+1}:**")
+                        # Show intermediate steps (the actual code execution and results)
+                        if "intermediate_steps" in result and result["intermediate_steps"]:
+                            with st.expander("🔍 View Detailed Execution Steps", expanded=False):
+                                for i, (action, observation) in enumerate(result["intermediate_steps"]):
+                                    st.markdown(f"**Step {i+1}:**")
                                 
-                                # Show the action/code executed
-                                if hasattr(action, 'tool_input'):
-                                    st.code(action.tool_input, language="python")
+                                    # Show the action/code executed
+                                    if hasattr(action, 'tool_input'):
+                                        st.code(action.tool_input, language="python")
                                 
-                                # Show the observation/result
-                                st.markdown("**Result:**")
+                                    # Show the observation/result
+                                    st.markdown("**Result:**")
                                 
-                                # Check if observation is a dataframe or can be converted to one
-                                try:
-                                    if isinstance(observation, pd.DataFrame):
-                                        st.dataframe(observation)
-                                    elif isinstance(observation, str) and observation.strip():
-                                        # Try to display as dataframe if it looks like tabular data
-                                        try:
-                                            temp_df = pd.read_csv(StringIO(observation))
-                                            st.dataframe(temp_df)
-                                        except:
-                                            st.text(observation)
-                                    else:
+                                    # Check if observation is a dataframe or can be converted to one
+                                    try:
+                                        if isinstance(observation, pd.DataFrame):
+                                            st.dataframe(observation)
+                                        elif isinstance(observation, str) and observation.strip():
+                                            # Try to display as dataframe if it looks like tabular data
+                                            try:
+                                                temp_df = pd.read_csv(StringIO(observation))
+                                                st.dataframe(temp_df)
+                                            except:
+                                                st.text(observation)
+                                        else:
+                                            st.write(observation)
+                                    except:
                                         st.write(observation)
-                                except:
-                                    st.write(observation)
                                 
-                                st.divider()
-                    
+                                    st.divider()
+
                     # # Additionally, check if the result itself contains a dataframe
                     # with st.expander("📊 Complete Output Data", expanded=True):
                     #     output_text = result["output"]
@@ -114,5 +138,19 @@ if openai_key:
                     with st.expander("Debug Information"):
                         import traceback
                         st.code(traceback.format_exc())
+
+                summary = telemetry.summary()
+                with st.expander("⏱ Request Telemetry", expanded=False):
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Total", f"{summary['total_ms'] / 1000:.2f}s")
+                    col2.metric("LLM", f"{summary['llm_ms'] / 1000:.2f}s")
+                    col3.metric("Pandas", f"{summary['tool_ms'] / 1000:.2f}s")
+                    col4.metric("Tokens", summary["total_tokens"])
+                    st.dataframe(telemetry.to_dataframe())
+
+                try:
+                    telemetry.export(summary)
+                except Exception as e:
+                    st.caption(f"Could not export metrics: {e}")
 else:
     st.warning("Please enter your OpenAI API key to continue.")
\ No newline at end of file
@@ -1,6 +1,6 @@
 from langchain_openai import ChatOpenAI
 
-def correct_prompt(prompt, table_head, api_key):
+def correct_prompt(prompt, table_head, api_key, callbacks=None):
     llm = ChatOpenAI(
         model="gpt-4o-mini",
         temperature=0,
@@ -17,5 +17,5 @@ Return only the corrected prompt so it handles edge cases and is more detailed f
 #Table Preview (First 5 rows)
 {table_head}
 """
-    response = llm.invoke(system_prompt)
+    response = llm.invoke(system_prompt, config={"callbacks": callbacks or []})
     return response.content.strip()
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pandas as pd
+from langchain_core.callbacks import BaseCallbackHandler
+
+METRICS_FILE = os.environ.get("NIYAMR_METRICS_FILE", "metrics.jsonl")
+METRICS_ENDPOINT = os.environ.get("NIYAMR_METRICS_ENDPOINT")
+# Questions can contain statement data, so only a hash leaves the app
+# unless this is set to 1
+METRICS_INCLUDE_QUESTION = os.environ.get("NIYAMR_METRICS_INCLUDE_QUESTION") == "1"
+
+
+class RequestTelemetry(BaseCallbackHandler):
+    """
+    Record per-request spans: prompt correction, each agent iteration,
+    each tool (pandas) execution and rendering, with durations and tokens.
+
+    Pass the instance as a callback to LangChain calls and wrap app-side
+    stages in ``telemetry.span(name)``. LLM calls made inside a span are
+    attributed to it; LLM calls inside the "agent" span are numbered as
+    agent iterations.
+    """
+
+    def __init__(self, question=""):
+        self.request_id = uuid4().hex
+        self.question = question
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._open = {}
+        self._stage = None
+        self._iteration = 0
+
+    # ---- app-side spans ----
+
+    @contextmanager
+    def span(self, name):
+        """Time a block of app code as a named span"""
+        parent = self._stage
+        self._stage = name
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self._stage = parent
+            self._record(name, "stage", start, parent=parent, error=error)
+
+    # ---- LangChain callbacks ----
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start_llm(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start_llm(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        name, parent, start = self._open.pop(run_id, ("llm_call", self._stage, None))
+        self._record(name, "llm", start, parent=parent, **_token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        name, parent, start = self._open.pop(run_id, ("llm_call", self._stage, None))
+        self._record(name, "llm", start, parent=parent, error=str(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        tool = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._open[run_id] = (f"tool:{tool}", self._stage, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name, parent, start = self._open.pop(run_id, ("tool", self._stage, None))
+        self._record(name, "tool", start, parent=parent)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        name, parent, start = self._open.pop(run_id, ("tool", self._stage, None))
+        self._record(name, "tool", start, parent=parent, error=str(error))
+
+    # ---- reporting ----
+
+    def summary(self, include_question=None):
+        """
+        Totals across the request. The question is replaced by its sha256
+        unless include_question (default NIYAMR_METRICS_INCLUDE_QUESTION) is set.
+        """
+        if include_question is None:
+            include_question = METRICS_INCLUDE_QUESTION
+        spans = self.spans
+        question = {"question_sha256": hashlib.sha256(self.question.encode("utf-8")).hexdigest()}
+        if include_question:
+            question["question"] = self.question
+        return {
+            "request_id": self.request_id,
+            "timestamp": self.timestamp,
+            **question,
+            "total_ms": round((time.perf_counter() - self._origin) * 1000, 1),
+            "llm_ms": round(sum(s["duration_ms"] for s in spans if s["kind"] == "llm"), 1),
+            "tool_ms": round(sum(s["duration_ms"] for s in spans if s["kind"] == "tool"), 1),
+            "llm_calls": sum(1 for s in spans if s["kind"] == "llm"),
+            "agent_iterations": self._iteration,
+            "prompt_tokens": sum(s.get("prompt_tokens", 0) for s in spans),
+            "completion_tokens": sum(s.get("completion_tokens", 0) for s in spans),
+            "total_tokens": sum(s.get("total_tokens", 0) for s in spans),
+        }
+
+    def to_dataframe(self):
+        """Spans as a dataframe, in start order"""
+        df = pd.DataFrame(self.spans)
+        if not df.empty:
+            df = df.sort_values("start_ms").reset_index(drop=True)
+        return df
+
+    def export(self, summary=None, path=None, endpoint=None):
+        """
+        Append this request's summary and spans as one JSON line to the
+        metrics file, and POST the same record to an endpoint if configured.
+        The POST runs on a daemon thread so a slow endpoint never delays
+        the answer.
+
+        Args:
+            summary (dict): Summary already shown to the user, so the
+                exported totals match it; computed if not given
+            path (str): Metrics file, defaults to NIYAMR_METRICS_FILE or metrics.jsonl
+            endpoint (str): URL to POST to, defaults to NIYAMR_METRICS_ENDPOINT
+
+        Returns:
+            dict: The exported record
+        """
+        record = {**(summary or self.summary()), "spans": self.spans}
+        line = json.dumps(record, default=str)
+
+        with open(path or METRICS_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+        endpoint = endpoint or METRICS_ENDPOINT
+        if endpoint:
+            threading.Thread(target=_post_metrics, args=(endpoint, line), daemon=True).start()
+
+        return record
+
+    # ---- internals ----
+
+    def _start_llm(self, run_id):
+        if self._stage == "agent":
+            self._iteration += 1
+            name = f"agent_iteration_{self._iteration}"
+        else:
+            name = "llm_call"
+        self._open[run_id] = (name, self._stage, time.perf_counter())
+
+    def _record(self, name, kind, start, parent=None, error=None, **extra):
+        end = time.perf_counter()
+        start = end if start is None else start
+        span = {
+            "name": name,
+            "kind": kind,
+            "parent": parent,
+            "start_ms": round((start - self._origin) * 1000, 1),
+            "duration_ms": round((end - start) * 1000, 1),
+            **extra,
+        }
+        if error:
+            span["error"] = error
+        self.spans.append(span)
+
+
+def _post_metrics(endpoint, line):
+    """POST one exported record; failures are only logged"""
+    request = urllib.request.Request(
+        endpoint,
+        data=line.encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        urllib.request.urlopen(request, timeout=5).close()
+    except Exception as e:
+        print(f"✗ Could not send metrics to {endpoint}: {e}")
+
+
+def _token_usage(response):
+    """Pull token counts from an LLMResult (OpenAI llm_output or usage_metadata)"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+
+    counts = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                counts["prompt_tokens"] += metadata.get("input_tokens", 0)
+                counts["completion_tokens"] += metadata.get("output_tokens", 0)
+                counts["total_tokens"] += metadata.get("total_tokens", 0)
+    return counts